@@ -10,7 +10,8 @@ Goals:
   - keep only the foreground glyph (cards + arrows + calculator), with appropriate contrast.
 """
 
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image
 import os
 
 # Paths
@@ -24,42 +25,56 @@ TINTED_OUT = os.path.join(OUTPUT_DIR, "AppIcon-1024-tinted.png")
 
 TARGET_SIZE = 1024
 
+# zlib level for the PNG outputs. 1 encodes several times faster than Pillow's default (6)
+# for a slightly larger file; set ICON_PNG_COMPRESS_LEVEL=9 for the smallest committed assets.
+# Setting it always regenerates, even when the outputs are otherwise up to date.
+PNG_COMPRESS_LEVEL = int(os.environ.get("ICON_PNG_COMPRESS_LEVEL", "1"))
+
 # Crop tuning (for the provided Gemini artwork)
 # - Higher sat threshold (0.07) to find actual colored gradient, not off-white background
 # - Minimal inset since saturation-based bounds are already tight to gradient
 CROP_SAT_THRESH = 0.07
 CROP_LUM_THRESH = 220.0
 CROP_INSET_PERCENT = 2.0  # Small inset to clean up any edge artifacts
-CROP_DOWNSCALE_MAX = 700
 
-def create_dark_gradient(size):
-    """Create a vertical gradient from #313131 (top) to #141414 (bottom)."""
-    width, height = size
-    gradient = Image.new('RGB', (width, height))
-    draw = ImageDraw.Draw(gradient)
-    
+# Rows per strip for the dark/tinted pass; keeps each strip's temporaries cache-resident.
+STRIP_ROWS = 64
+
+def _dark_gradient_levels(height: int) -> np.ndarray:
+    """
+    Gray level per row of the #313131 -> #141414 vertical gradient, as (height,) uint8.
+
+    Both ends are neutral grays, so one value per row describes all three channels.
+    """
     # Top color: #313131 = (49, 49, 49)
     # Bottom color: #141414 = (20, 20, 20)
-    top_color = (49, 49, 49)
-    bottom_color = (20, 20, 20)
-    
-    for y in range(height):
-        ratio = y / height
-        r = int(top_color[0] + (bottom_color[0] - top_color[0]) * ratio)
-        g = int(top_color[1] + (bottom_color[1] - top_color[1]) * ratio)
-        b = int(top_color[2] + (bottom_color[2] - top_color[2]) * ratio)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-    
-    return gradient
+    top_level = 49.0
+    bottom_level = 20.0
+
+    ratio = np.arange(height, dtype=np.float64) / height
+    return (top_level + (bottom_level - top_level) * ratio).astype(np.uint8)
+
 
+def _rgb_planes(img: Image.Image) -> np.ndarray:
+    """
+    Split an RGB image into a (3, H, W) int16 array of contiguous channel planes.
+
+    Per-channel math then runs over unit-stride memory instead of striding
+    through interleaved pixels; int16 leaves room for signed differences like r - b.
+    """
+    return np.asarray(img).transpose(2, 0, 1).astype(np.int16, order="C")
 
-def _luminance(r: int, g: int, b: int) -> float:
-    return 0.299 * r + 0.587 * g + 0.114 * b
 
+def _luminance(r: np.ndarray, g: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Integer Rec. 601 luma: weights 0.299/0.587/0.114 scaled to 77/150/29 (sum 256),
+    # so `>> 8` lands back on the 0-255 scale. int32 keeps 150 * 255 from overflowing.
+    r, g, b = (c.astype(np.int32) for c in (r, g, b))
+    return (77 * r + 150 * g + 29 * b) >> 8
 
-def _is_orange_accent(r: int, g: int, b: int) -> bool:
+
+def _is_orange_accent(r: np.ndarray, g: np.ndarray, b: np.ndarray) -> np.ndarray:
     # Broad heuristic for the orange buttons in the glyph.
-    return r > 170 and g > 80 and b < 140 and (r - b) > 80
+    return (r > 170) & (g > 80) & (b < 140) & ((r - b) > 80)
 
 
 def crop_to_gradient_tile_square(
@@ -67,57 +82,33 @@ def crop_to_gradient_tile_square(
     sat_thresh: float = CROP_SAT_THRESH,
     lum_thresh: float = CROP_LUM_THRESH,
     inset_percent: float = CROP_INSET_PERCENT,
-    downscale_max: int = CROP_DOWNSCALE_MAX,
 ) -> Image.Image:
     """
     Crop to the colorful gradient tile (removing the large white outer canvas).
 
     Strategy:
-    - Downscale for speed
     - Find bounds of pixels that are either:
       - sufficiently saturated (the gradient tile)
       - sufficiently dark (the glyph outlines)
-    - Scale bounds back up, inset slightly to remove halo/shadow, then square-crop.
+    - Inset slightly to remove halo/shadow, then square-crop.
     """
-    rgb = img.convert("RGB")
+    rgb = img if img.mode == "RGB" else img.convert("RGB")
     w, h = rgb.size
 
-    scale = min(1.0, float(downscale_max) / float(max(w, h)))
-    sw = max(1, int(round(w * scale)))
-    sh = max(1, int(round(h * scale)))
-    small = rgb.resize((sw, sh), Image.Resampling.BILINEAR)
-    pixels = small.load()
-
-    min_x, min_y = sw, sh
-    max_x, max_y = 0, 0
-
-    for y in range(sh):
-        for x in range(sw):
-            r, g, b = pixels[x, y]
-            lum = _luminance(r, g, b)
-            max_c = max(r, g, b)
-            min_c = min(r, g, b)
-            sat = (max_c - min_c) / 255.0 if max_c > 0 else 0.0
-
-            if sat > sat_thresh or lum < lum_thresh:
-                if x < min_x:
-                    min_x = x
-                if y < min_y:
-                    min_y = y
-                if x > max_x:
-                    max_x = x
-                if y > max_y:
-                    max_y = y
-
-    if max_x <= min_x or max_y <= min_y:
+    planes = _rgb_planes(rgb)
+
+    # Saturation test stays in integer channel units: (max - min) / 255 > t.
+    mask = np.ptp(planes, axis=0) > sat_thresh * 255.0
+    mask |= _luminance(*planes) < lum_thresh
+
+    # Let Pillow's C getbbox find the nonzero extent (right/bottom exclusive).
+    bbox = Image.fromarray(mask.view(np.uint8)).getbbox()
+    if bbox is None:
         return rgb
 
-    # Convert small-image bounds back to original coordinates.
-    inv = 1.0 / scale
-    left = int(round(min_x * inv))
-    top = int(round(min_y * inv))
-    right = int(round((max_x + 1) * inv))
-    bottom = int(round((max_y + 1) * inv))
+    left, top, right, bottom = bbox
+    if right - left <= 1 or bottom - top <= 1:
+        return rgb
 
     # Inset slightly to remove halo/shadow around the tile.
     side = max(right - left, bottom - top)
@@ -127,20 +118,16 @@ def crop_to_gradient_tile_square(
     right -= inset_px
     bottom -= inset_px
 
-    # Center square crop.
-    cx = (left + right) / 2.0
-    cy = (top + bottom) / 2.0
+    # Center square crop, in integer pixels. Slide the square back inside the image
+    # rather than truncating it, so padding is only needed if it is wider than the image.
     side2 = max(right - left, bottom - top)
+    cx = (left + right) // 2
+    cy = (top + bottom) // 2
 
-    sq_left = int(round(cx - side2 / 2.0))
-    sq_top = int(round(cy - side2 / 2.0))
-    sq_right = sq_left + int(round(side2))
-    sq_bottom = sq_top + int(round(side2))
-
-    sq_left = max(0, sq_left)
-    sq_top = max(0, sq_top)
-    sq_right = min(w, sq_right)
-    sq_bottom = min(h, sq_bottom)
+    sq_left = int(np.clip(cx - side2 // 2, 0, max(0, w - side2)))
+    sq_top = int(np.clip(cy - side2 // 2, 0, max(0, h - side2)))
+    sq_right = min(w, sq_left + side2)
+    sq_bottom = min(h, sq_top + side2)
 
     cropped = rgb.crop((sq_left, sq_top, sq_right, sq_bottom))
 
@@ -157,119 +144,127 @@ def crop_to_gradient_tile_square(
 
 def create_light_icon(original_img: Image.Image) -> Image.Image:
     cropped = crop_to_gradient_tile_square(original_img)
-    return cropped.resize((TARGET_SIZE, TARGET_SIZE), Image.Resampling.LANCZOS).convert("RGB")
+    # reducing_gap=2.0: once the crop reaches 4x the target, Pillow first box-reduces it
+    # (cheap, C-level) by src // (2 * TARGET_SIZE), then LANCZOS covers the last >= 2x step.
+    # The crop is already RGB, and resize preserves the mode.
+    return cropped.resize((TARGET_SIZE, TARGET_SIZE), Image.Resampling.LANCZOS, reducing_gap=2.0)
 
 
-def is_foreground_pixel(r: int, g: int, b: int) -> bool:
+def classify_foreground_pixels(planes: np.ndarray):
     """
     Foreground detection tuned for this icon:
     - outlines/arrows: darker pixels
     - calculator buttons: mid-gray pixels
     - orange accent: orange pixels
     Background gradient is very light, so a luminance threshold works well.
+
+    Takes (3, H, W) int16 RGB planes and returns (lum, orange, outline, mid),
+    computed once and shared by the dark and tinted variants.
     """
+    r, g, b = planes
     lum = _luminance(r, g, b)
-    if _is_orange_accent(r, g, b):
-        return True
-    return lum < 205
+    orange = _is_orange_accent(r, g, b)
+    glyph = ~orange & (lum < 205)
+    outline = glyph & (lum < 120)
+    mid = glyph & (lum >= 120)
+    return lum, orange, outline, mid
 
 
-def create_dark_icon(source_img):
+def _fill_dark_and_tinted(
+    planes: np.ndarray, bg: np.ndarray, dark: np.ndarray, tinted: np.ndarray
+) -> None:
     """
-    Create dark mode icon:
-    - Dark gradient background
-    - Foreground elements with inverted/adjusted colors for contrast
+    Write one strip of the dark/tinted icons into `dark`/`tinted` in place.
+
+    `bg` holds the strip's dark gradient levels as an (H, 1) column. Every pixel is
+    resolved with np.where selects rather than masked scatters, so the strip is
+    written densely in one go.
     """
-    size = source_img.size
-    
-    # Create dark gradient background
-    dark_bg = create_dark_gradient(size)
-    
-    src = source_img.convert("RGB")
-    result = dark_bg.convert("RGB")
-    
-    width, height = size
-    src_pixels = src.load()
-    result_pixels = result.load()
-    
-    for y in range(height):
-        for x in range(width):
-            r, g, b = src_pixels[x, y]
-            if not is_foreground_pixel(r, g, b):
-                continue
-
-            lum = _luminance(r, g, b)
-            # Preserve orange accent.
-            if _is_orange_accent(r, g, b):
-                result_pixels[x, y] = (min(255, int(r * 1.05)), min(255, int(g * 1.05)), b)
-                continue
-
-            # Outlines/arrows -> white
-            if lum < 120:
-                result_pixels[x, y] = (240, 240, 240)
-            else:
-                # Mid-gray buttons -> darker gray for dark mode
-                v = max(70, min(140, int(lum * 0.55)))
-                result_pixels[x, y] = (v, v, v)
-
-    return result
-
-
-def create_tinted_icon(source_img):
+    lum, orange, outline, mid = classify_foreground_pixels(planes)
+
+    # Non-accent pixels are gray in both variants:
+    # - dark: outlines/arrows -> white, mid-gray buttons -> darker gray (~0.55x)
+    # - tinted: outlines/arrows -> white, buttons/filled areas -> mid gray (still tints,
+    #   but with depth); the accent is made bright so it tints strongly.
+    dark_gray = np.where(outline, 240, np.where(mid, np.clip((lum * 141) >> 8, 70, 140), bg))
+    tinted_gray = np.where(orange | outline, 255, np.where(mid, np.clip(lum, 140, 220), 0))
+
+    # Preserve orange accent in dark mode.
+    r, g, b = planes
+    dark[..., 0] = np.where(orange, np.minimum(255, (r * 1.05).astype(np.int16)), dark_gray)
+    dark[..., 1] = np.where(orange, np.minimum(255, (g * 1.05).astype(np.int16)), dark_gray)
+    dark[..., 2] = np.where(orange, b, dark_gray)
+    tinted[...] = tinted_gray[..., None]
+
+
+def create_dark_and_tinted_icons(planes: np.ndarray) -> tuple[Image.Image, Image.Image]:
     """
-    Create tinted mode icon:
+    Create the dark and tinted mode icons from one pass over the light icon.
+
+    Dark mode icon:
+    - Dark gradient background
+    - Foreground elements with inverted/adjusted colors for contrast
+
+    Tinted mode icon:
     - Black background
     - Grayscale foreground elements (lighter = more visible when tinted)
     - The system will apply the user's chosen tint color
+
+    `planes` is the light icon as (3, H, W) int16 channel planes (see `main`).
     """
-    size = source_img.size
-    
-    src = source_img.convert("RGB")
-    result = Image.new("RGB", size, (0, 0, 0))
-    result_pixels = result.load()
-    
-    width, height = size
-    src_pixels = src.load()
-    
-    for y in range(height):
-        for x in range(width):
-            r, g, b = src_pixels[x, y]
-            if not is_foreground_pixel(r, g, b):
-                continue
-
-            lum = _luminance(r, g, b)
-            if _is_orange_accent(r, g, b):
-                # Make the accent bright so it tints strongly.
-                result_pixels[x, y] = (255, 255, 255)
-            elif lum < 120:
-                # Outlines/arrows -> white
-                result_pixels[x, y] = (255, 255, 255)
-            else:
-                # Buttons/filled areas -> mid gray (still tints, but with depth).
-                v = max(140, min(220, int(lum)))
-                result_pixels[x, y] = (v, v, v)
-    
-    return result
+    _, height, width = planes.shape
+
+    # Dark gradient background, one gray level per row.
+    bg = _dark_gradient_levels(height)[:, None]
+    dark = np.empty((height, width, 3), dtype=np.uint8)
+    tinted = np.empty((height, width, 3), dtype=np.uint8)
+
+    for y in range(0, height, STRIP_ROWS):
+        rows = slice(y, y + STRIP_ROWS)
+        _fill_dark_and_tinted(planes[:, rows], bg[rows], dark[rows], tinted[rows])
+
+    return Image.fromarray(dark), Image.fromarray(tinted)
+
+
+def _outputs_up_to_date() -> bool:
+    """
+    True if every output exists and is newer than the artwork and this script.
+
+    An explicit ICON_PNG_COMPRESS_LEVEL counts as stale: the existing files may have
+    been written at a different level, and mtimes cannot tell.
+    """
+    if "ICON_PNG_COMPRESS_LEVEL" in os.environ:
+        return False
+
+    inputs_mtime = max(os.path.getmtime(ORIGINAL_SOURCE), os.path.getmtime(__file__))
+    return all(
+        os.path.exists(path) and os.path.getmtime(path) > inputs_mtime
+        for path in (LIGHT_OUT, DARK_OUT, TINTED_OUT)
+    )
 
 
 def main():
+    if _outputs_up_to_date():
+        print(
+            "✓ Icon variants are up to date (set ICON_PNG_COMPRESS_LEVEL, delete an output, "
+            "or touch the artwork to regenerate)."
+        )
+        return
+
     print("Loading original artwork...")
     original = Image.open(ORIGINAL_SOURCE)
     print(f"Original size: {original.size}, mode: {original.mode}")
 
     print("\nCreating LIGHT icon (crop away white border, keep gradient)...")
     light = create_light_icon(original)
-    light.save(LIGHT_OUT, "PNG")
+    light.save(LIGHT_OUT, "PNG", compress_level=PNG_COMPRESS_LEVEL)
     print(f"✓ Saved: {LIGHT_OUT}")
 
-    print("\nCreating DARK icon...")
-    dark_icon = create_dark_icon(light)
-    dark_icon.save(DARK_OUT, "PNG")
+    print("\nCreating DARK and TINTED icons...")
+    dark_icon, tinted_icon = create_dark_and_tinted_icons(_rgb_planes(light))
+    dark_icon.save(DARK_OUT, "PNG", compress_level=PNG_COMPRESS_LEVEL)
     print(f"✓ Saved: {DARK_OUT}")
-
-    print("\nCreating TINTED icon...")
-    tinted_icon = create_tinted_icon(light)
-    tinted_icon.save(TINTED_OUT, "PNG")
+    tinted_icon.save(TINTED_OUT, "PNG", compress_level=PNG_COMPRESS_LEVEL)
     print(f"✓ Saved: {TINTED_OUT}")
     
     print("\n✅ All icon variants created successfully!")